@@ -14,22 +14,51 @@ Also provides reverse DCF functionality where the required revenue growth rate,
 free cash flow margin, and rate of return are calculated based on current stock 
 price.
 
-pyinstaller.exe GUI.py --clean --onedir -i logo/icon.ico --noconsole --exclude-module PyQt6 --name Intrinsic-Value-Calculator-OS
+python build_aot.py   (optional, precompiles src/dcf_kernels so the frozen app skips the JIT)
+pyinstaller.exe GUI.py --clean --onedir -i logo/icon.ico --noconsole --exclude-module PyQt6 --hidden-import src.dcf_kernels --name Intrinsic-Value-Calculator-OS
 '''
 
 import sys
-from scipy.optimize import minimize_scalar
+import math
+import functools
+from dataclasses import dataclass
 from PySide6 import QtCore
 from PySide6.QtWidgets import QApplication, QMainWindow
 from PySide6.QtWidgets import QVBoxLayout, QWidget
-from PySide6.QtWidgets import QGridLayout
-from PySide6.QtGui import QIcon
-from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QGridLayout, QFormLayout
+from PySide6.QtGui import QIcon, QTextCursor, QTextBlockFormat
+from PySide6.QtCore import Qt, QThreadPool, QTimer
 from src.provider import *
 from src.gui_elements import *
-import warnings
-import qdarktheme
-warnings.simplefilter(action='ignore', category=FutureWarning)
+from src.workers import FetchWorker
+
+@dataclass(slots=True)
+class DCFInputs:
+    # User assumptions, parsed and checked before anything is fetched
+    ticker: str
+    rev_growth: float
+    fcf_margin: float
+    nyears: int
+    wacc: float
+    tgr: float
+
+    @classmethod
+    def from_gui(cls, app):
+        # Raises ValueError on empty or malformed fields
+        ticker = app.ticker_entry.text().strip().upper()
+        if not ticker:
+            raise ValueError("Ticker is empty")
+        inputs = cls(ticker,
+                     float(app.rev_growth_entry.text()) / 100,
+                     float(app.fcf_margin_entry.text()) / 100,
+                     int(app.nyears_entry.text()),
+                     float(app.wacc_entry.text()) / 100,
+                     float(app.tgr_entry.text()) / 100)
+        if inputs.nyears < 1:
+            raise ValueError("Number of years must be at least 1")
+        if inputs.wacc <= inputs.tgr:
+            raise ValueError("Discount rate must be above the terminal growth rate")
+        return inputs
 
 class DCFApp(QMainWindow):
     def __init__(self):
@@ -37,8 +66,11 @@ class DCFApp(QMainWindow):
         self.setWindowTitle("Intrinsic Value Calculator")
         self.setMinimumSize(700, 800)
 
-        # Activate dark mode by default
-        qdarktheme.setup_theme("dark")
+        # (stylesheet, palette) for each theme applied so far
+        self._themes = {}
+
+        # Activate dark mode by default, once the window is up
+        QTimer.singleShot(0, lambda: self.set_theme("dark"))
 
         # Set icon
         my_icon = QIcon()
@@ -48,13 +80,42 @@ class DCFApp(QMainWindow):
         # Load font
         self.font_size = 12
 
+        # (ticker, StockInfo) from the last fetch, reused by Calculate after Populate Info
+        # only while get_info's cache still holds it, i.e. for at most INFO_CACHE_TTL seconds
+        self._last_ticker_info = None
+        self._dcf_inputs = None     # DCFInputs of the calculation waiting on a fetch
+        self._busy = False          # True while a fetch is in flight
+
         # Create widgets
         self.input_frame = QWidget()
         self.output_frame = QWidget()
 
-        # Create frames
+        # Create frames, with updates off so Qt lays them out once at the end
+        self.setUpdatesEnabled(False)
         self.create_input_frame()
         self.create_output_frame()
+        self.setUpdatesEnabled(True)
+
+        # Fields cleared before every calculation, plus the user inputs on Reset
+        self._output_fields = [self.fv_entry, self.cp_entry, self.ud_entry, self.info_text,
+                               self.rrev_entry, self.rfcf_entry, self.rwacc_entry,
+                               self.curr_rev_entry, self.total_shares_entry, self.perc_float_entry,
+                               self.perc_short_entry, self.avg_vol_entry, self.mcap_entry, self.erev_entry]
+        self._resettable = [self.ticker_entry, self.rev_growth_entry, self.fcf_margin_entry] + self._output_fields
+        # Fields filled from StockInfo.extra_info, in the same order
+        self._extra_info_fields = (self.curr_rev_entry, self.total_shares_entry, self.perc_float_entry,
+                                   self.perc_short_entry, self.avg_vol_entry, self.mcap_entry)
+
+        # Block format applied to the whole info table
+        self._centred_block = QTextBlockFormat()
+        self._centred_block.setAlignment(QtCore.Qt.AlignCenter | QtCore.Qt.AlignVCenter)
+
+        # Bound methods for the click handlers, looked up once here
+        self._clear_outputs = [field.clear for field in self._output_fields]
+        self._clear_all = [field.clear for field in self._resettable]
+
+        # Text last shown in each output field, so unchanged values are not set again
+        self._shown = {}
 
         # Add frames to main layout
         main_layout = QVBoxLayout()
@@ -66,6 +127,9 @@ class DCFApp(QMainWindow):
         central_widget.setLayout(main_layout)
         self.setCentralWidget(central_widget)
 
+        # Background warm-up once the window has been painted
+        QTimer.singleShot(0, self.warm_up)
+
     def create_input_frame(self):
         # Toggle Button for Dark Mode
         self.toggle_button, theme_layout = get_dark_mode_toggle_button(self.valuechange)
@@ -165,6 +229,23 @@ class DCFApp(QMainWindow):
 
         self.input_frame.setLayout(final_layout)
 
+        # Numeric fields only take numbers in range, checked by Qt as the user types
+        self.rev_growth_entry.setValidator(get_double_validator(-100.0, 1000.0, 4, self.rev_growth_entry))
+        self.fcf_margin_entry.setValidator(get_double_validator(-100.0, 1000.0, 4, self.fcf_margin_entry))
+        self.nyears_entry.setValidator(get_int_validator(1, 50, self.nyears_entry))
+        self.wacc_entry.setValidator(get_double_validator(0.0, 100.0, 4, self.wacc_entry))
+        self.tgr_entry.setValidator(get_double_validator(-100.0, 100.0, 4, self.tgr_entry))
+
+        # Calculate stays greyed out until every input is filled in and valid
+        self._required_entries = (self.ticker_entry, self.rev_growth_entry, self.fcf_margin_entry,
+                                  self.nyears_entry, self.wacc_entry, self.tgr_entry)
+        for entry in self._required_entries:
+            entry.textChanged.connect(self.update_calculate_enabled)
+        self.update_calculate_enabled()
+
+        # Start fetching the ticker as soon as it is entered, while the user fills in the rest
+        self.ticker_entry.editingFinished.connect(self.on_ticker_entered)
+
     def create_output_frame(self):
         output_layout = QGridLayout()
         
@@ -182,20 +263,28 @@ class DCFApp(QMainWindow):
         self.credit_label.setOpenExternalLinks(True)
 
         # Reverse DCF outputs
-        self.rrev_entry, rrev_layout = get_text_entry_box("Required Revenue Growth at Current FCF Margin (%):     ", self.font_size, readOnly=True)
+        self.rrev_entry, rrev_label = get_text_entry_box_two("Required Revenue Growth at Current FCF Margin (%):     ", self.font_size, readOnly=True)
         self.sep1 = get_label(" Or ", self.font_size)
-        self.rfcf_entry, rfcf_layout = get_text_entry_box("Required Free Cash Flow Margin at Current Revenue Growth (%):     ", self.font_size, readOnly=True)
+        self.rfcf_entry, rfcf_label = get_text_entry_box_two("Required Free Cash Flow Margin at Current Revenue Growth (%):     ", self.font_size, readOnly=True)
         self.sep2 = get_label(" Or ", self.font_size)
-        self.rwacc_entry, rwacc_layout = get_text_entry_box("Obtained Compounded Return Rate for Selected Number of Years:     ", self.font_size, readOnly=True)
+        self.rwacc_entry, rwacc_label = get_text_entry_box_two("Obtained Compounded Return Rate for Selected Number of Years:     ", self.font_size, readOnly=True)
+        self.sep1.setAlignment(Qt.AlignCenter)
+        self.sep2.setAlignment(Qt.AlignCenter)
+
+        # Reverse DCF rows as one form, the "Or" separators span both columns
+        rev_form_layout = QFormLayout()
+        rev_form_layout.setLabelAlignment(Qt.AlignRight)
+        rev_form_layout.setFormAlignment(Qt.AlignHCenter)
+        rev_form_layout.addRow(rrev_label, self.rrev_entry)
+        rev_form_layout.addRow(self.sep1)
+        rev_form_layout.addRow(rfcf_label, self.rfcf_entry)
+        rev_form_layout.addRow(self.sep2)
+        rev_form_layout.addRow(rwacc_label, self.rwacc_entry)
 
         # Lay out the output frame
         rev_dcf_layout = QVBoxLayout()
         rev_dcf_layout.addWidget(self.rev_dcf_start, alignment=Qt.AlignCenter)
-        rev_dcf_layout.addLayout(rrev_layout)
-        rev_dcf_layout.addWidget(self.sep1, alignment=Qt.AlignCenter)
-        rev_dcf_layout.addLayout(rfcf_layout)
-        rev_dcf_layout.addWidget(self.sep2, alignment=Qt.AlignCenter)
-        rev_dcf_layout.addLayout(rwacc_layout)
+        rev_dcf_layout.addLayout(rev_form_layout)
         rev_dcf_layout.addWidget(self.credit_label, alignment=Qt.AlignCenter)
 
         output_layout.addLayout(fv_layout, 0, 0)
@@ -207,97 +296,179 @@ class DCFApp(QMainWindow):
         # Finalize output frame
         self.output_frame.setLayout(output_layout)
 
+    def warm_up(self):
+        # Import yfinance and compile the DCF kernels off the GUI thread,
+        # so the first Populate/Calculate does not pay for either. They get their own
+        # pool, a cold kernel compile takes seconds and fetches must not queue behind it
+        self._warm_up_pool = QThreadPool()
+        self._warm_up_pool.setMaxThreadCount(1)
+        self._warm_up_pool.start(warm_up_imports)
+        self._warm_up_pool.start(warm_up_kernels)
+
+    def set_theme(self, theme):
+        # qdarktheme is only imported when a theme is first applied
+        import qdarktheme
+        app = QApplication.instance()
+        if not self._themes:
+            # The first call also installs qdarktheme's proxy style
+            qdarktheme.setup_theme(theme)
+            self._themes[theme] = (app.styleSheet(), app.palette())
+            return
+
+        # Later toggles swap a stylesheet and palette generated once per theme
+        if theme not in self._themes:
+            self._themes[theme] = (qdarktheme.load_stylesheet(theme),
+                                   qdarktheme.load_palette(theme, for_stylesheet=True))
+        stylesheet, palette = self._themes[theme]
+        app.setStyleSheet(stylesheet)
+        app.setPalette(palette)
+
     def valuechange(self):
         if self.toggle_button.text() == "Turn Dark Mode OFF":
-            qdarktheme.setup_theme("light")
+            self.set_theme("light")
             self.toggle_button.setText("Turn Dark Mode ON")
         else:
-            qdarktheme.setup_theme("dark")
+            self.set_theme("dark")
             self.toggle_button.setText("Turn Dark Mode OFF")
 
+    def set_busy(self, busy):
+        # Both buttons stay disabled while a fetch is in flight
+        self._busy = busy
+        self.populate_button.setEnabled(not busy)
+        self.update_calculate_enabled()
+
+    def update_calculate_enabled(self):
+        inputs_ok = all(entry.hasAcceptableInput() for entry in self._required_entries[1:]) \
+                    and bool(self.ticker_entry.text().strip())
+        self.calculate_button.setEnabled(inputs_ok and not self._busy)
+
+    def fetch_ticker_info(self, ticker, on_fetched):
+        # Reuse the last fetch, otherwise query yfinance on the thread pool
+        if self.has_fetched(ticker):
+            on_fetched(*self._last_ticker_info)
+            return
+        self.set_busy(True)
+        worker = FetchWorker(ticker)
+        worker.signals.finished.connect(on_fetched)
+        worker.signals.error.connect(self.on_fetch_error)
+        QThreadPool.globalInstance().start(worker)
+
+    def on_ticker_entered(self):
+        # Only warms get_info's cache, Populate/Calculate still fetch (and wait on) it themselves
+        ticker = self.ticker_entry.text().strip().upper()
+        if ticker and not self.has_fetched(ticker):
+            QThreadPool.globalInstance().start(functools.partial(prefetch_info, ticker))
+
+    def on_fetch_error(self, ticker, message):
+        self.set_busy(False)
+        self.show_text(self.fv_entry, "Error")
+
+    def has_fetched(self, ticker):
+        # Expires with get_info's cache, which counts from when the data was downloaded
+        return self._last_ticker_info is not None and self._last_ticker_info[0] == ticker \
+               and is_info_fresh(ticker, self._last_ticker_info[1])
+
+    def show_text(self, field, text):
+        # Skip setText (and the repaint it triggers) when the field already shows this text
+        if self._shown.get(field) != text:
+            field.setText(text)
+            self._shown[field] = text
+
+    def clear_outputs(self):
+        self.setUpdatesEnabled(False)
+        for clear in self._clear_outputs:
+            clear()
+        self._shown.clear()
+        self.setUpdatesEnabled(True)
+
+    def set_info_text(self, info_str):
+        if self._shown.get(self.info_text) == info_str:
+            return
+        self._shown[self.info_text] = info_str
+        # Text and alignment change together, so hold repaints until both are in
+        self.info_text.setUpdatesEnabled(False)
+        self.info_text.setPlainText(info_str)
+        # Centre every block with one format merge instead of per-line setAlignment
+        cursor = self.info_text.textCursor()
+        cursor.select(QTextCursor.Document)
+        cursor.mergeBlockFormat(self._centred_block)
+        cursor.clearSelection()
+        self.info_text.setTextCursor(cursor)
+        self.info_text.setUpdatesEnabled(True)
+
     def populate_info(self):
-        self.info_text.clear()
-        _, _, _, _, _, info_str, extra_info = get_info(self.ticker_entry.text().upper())
-        lines = info_str.splitlines()
-        lines[-1] = lines[-1] + '     '
-        for i, line in enumerate(lines):
-            self.info_text.append(line)
-            self.info_text.setAlignment(QtCore.Qt.AlignCenter | QtCore.Qt.AlignVCenter)
-        self.curr_rev_entry.setText(extra_info[0])
-        self.total_shares_entry.setText(extra_info[1])
-        self.perc_float_entry.setText(extra_info[2])
-        self.perc_short_entry.setText(extra_info[3])
-        self.avg_vol_entry.setText(extra_info[4])
-        self.mcap_entry.setText(extra_info[5])
+        ticker = self.ticker_entry.text().strip().upper()
+        if not self.has_fetched(ticker):
+            self.info_text.clear()
+            self._shown.pop(self.info_text, None)
+        self.fetch_ticker_info(ticker, self.on_populate_fetched)
+
+    def on_populate_fetched(self, ticker, info):
+        self._last_ticker_info = (ticker, info)
+        self.set_busy(False)
+        info_str, extra_info = info.info_str, info.extra_info
+        self.set_info_text(info_str)
+        for field, text in zip(self._extra_info_fields, extra_info):
+            self.show_text(field, text)
 
     def calculate_dcf(self):
-        ticker = self.ticker_entry.text().upper()
-        rev_growth_rate = float(self.rev_growth_entry.text()) / 100
-        fcf_margin      = float(self.fcf_margin_entry.text()) / 100
-        nyears          = int(self.nyears_entry.text())
-        wacc            = float(self.wacc_entry.text()) / 100
-        tgr             = float(self.tgr_entry.text()) / 100
+        # Bad input is reported right away, without going to the network
+        try:
+            inputs = DCFInputs.from_gui(self)
+        except ValueError as e:
+            self.clear_outputs()
+            self.show_text(self.fv_entry, "Invalid Input")
+            self.fv_entry.setToolTip(str(e))
+            return
+        self.fv_entry.setToolTip("")
+
+        # Blank the outputs while a new ticker is fetched, a fetched one is overwritten in place
+        if not self.has_fetched(inputs.ticker):
+            self.clear_outputs()
+
+        # Inputs are held until the fetch for this ticker comes back
+        self._dcf_inputs = inputs
+        self.fetch_ticker_info(inputs.ticker, self.on_calculate_fetched)
+
+    def on_calculate_fetched(self, ticker, info):
+        self._last_ticker_info = (ticker, info)
+        self.set_busy(False)
+        inputs = self._dcf_inputs
+        rev_growth_rate, fcf_margin, nyears, wacc, tgr = inputs.rev_growth, inputs.fcf_margin, inputs.nyears, inputs.wacc, inputs.tgr
 
         try:
-            self.fv_entry.clear()
-            self.cp_entry.clear()
-            self.ud_entry.clear()
-            self.info_text.clear()
-            self.rrev_entry.clear()
-            self.rfcf_entry.clear()
-            self.rwacc_entry.clear()
-            self.curr_rev_entry.clear()
-            self.total_shares_entry.clear()
-            self.perc_float_entry.clear()
-            self.perc_short_entry.clear()
-            self.avg_vol_entry.clear()
-            self.mcap_entry.clear()
-            self.erev_entry.clear()
-            current_price, total_shares, prev_rev_growth, starting_rev, prev_fcf_margin, info_str, extra_info = get_info(ticker)
-            lines = info_str.splitlines()
-            lines[-1] = lines[-1] + '     '
-            for line in lines:
-                self.info_text.append(line)
-                self.info_text.setAlignment(QtCore.Qt.AlignCenter | QtCore.Qt.AlignVCenter)
+            # Only the fields the GUI shows, the historical rates stay on the StockInfo
+            current_price, total_shares, starting_rev = info.current_price, info.total_shares, info.starting_rev
+            info_str, extra_info = info.info_str, info.extra_info
+            self.set_info_text(info_str)
             results = dcf(rev_growth_rate, fcf_margin, nyears, starting_rev, wacc, tgr, total_shares, current_price)
             fair_value, req_rg, req_wacc, req_fcf, curr_rev_growth = results
-            final_rev = '$' + get_out_str(starting_rev*(1+rev_growth_rate)**(float(nyears))) # Revenue after N years
-            self.curr_rev_entry.setText(extra_info[0])
-            self.total_shares_entry.setText(extra_info[1])
-            self.perc_float_entry.setText(extra_info[2])
-            self.perc_short_entry.setText(extra_info[3])
-            self.avg_vol_entry.setText(extra_info[4])
-            self.mcap_entry.setText(extra_info[5])
-            self.fv_entry.setText("$"+str(fair_value))
-            self.cp_entry.setText("$"+str(current_price))
-            self.ud_entry.setText(str(calc_up_downside(fair_value, current_price))+"%")
-            self.rev_dcf_start.setText("\nTo Justify the Current Price of ${}".format(current_price))
-            self.rrev_entry.setText(str(req_rg))
-            self.rfcf_entry.setText(str(req_fcf))
-            self.rwacc_entry.setText(str(req_wacc))
-            self.erev_entry.setText(final_rev)
+            final_rev = f"${get_out_str(float(starting_rev)*math.pow(1.0+rev_growth_rate, float(nyears)))}" # Revenue after N years
+            show = self.show_text
+            for field, text in zip(self._extra_info_fields, extra_info):
+                show(field, text)
+            show(self.fv_entry, f"${fair_value:,.2f}")
+            show(self.cp_entry, f"${current_price:,.2f}")
+            show(self.ud_entry, f"{calc_up_downside(fair_value, current_price):.2f}%")
+            show(self.rev_dcf_start, f"\nTo Justify the Current Price of ${current_price:,.2f}")
+            show(self.rrev_entry, get_rate_str(req_rg, '.2f'))
+            show(self.rfcf_entry, get_rate_str(req_fcf, '.2f'))
+            show(self.rwacc_entry, get_rate_str(req_wacc, '.2f'))
+            show(self.erev_entry, final_rev)
         except Exception as e:
-            self.fv_entry.setText(f"Error")
+            self.clear_outputs()
+            self.show_text(self.fv_entry, "Error")
 
     def reset_fields(self):
-        # Can improve this by making a running list of entries to reset and run a for loop
-        self.ticker_entry.clear()
-        self.rev_growth_entry.clear()
-        self.fcf_margin_entry.clear()
-        self.fv_entry.clear()
-        self.cp_entry.clear()
-        self.ud_entry.clear()
-        self.info_text.clear()
-        self.rrev_entry.clear()
-        self.rfcf_entry.clear()
-        self.rwacc_entry.clear()
-        self.curr_rev_entry.clear()
-        self.total_shares_entry.clear()
-        self.perc_float_entry.clear()
-        self.perc_short_entry.clear()
-        self.avg_vol_entry.clear()
-        self.mcap_entry.clear()
-        self.erev_entry.clear()
+        # Forget the last fetched ticker
+        self._last_ticker_info = None
+
+        # Clear everything in one pass so Qt repaints once
+        self.setUpdatesEnabled(False)
+        for clear in self._clear_all:
+            clear()
+        self._shown.clear()
+        self.setUpdatesEnabled(True)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
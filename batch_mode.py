@@ -40,12 +40,16 @@ Stock_Ticker  , Rev_Growth_Estimate, FCF_Margin_Estimate
 
 import numpy as np
 import argparse
-import csv, time
-import pandas as pd
-from tabulate import tabulate
+import csv
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from src.provider import *
-import warnings
-warnings.simplefilter(action='ignore', category=FutureWarning)
+
+# Tickers fetched at once. yfinance waits on the network with the GIL released, so a few
+# threads overlap the downloads, while staying gentle on Yahoo's rate limits
+FETCH_WORKERS = 4
+
+# One fixed-width console line per analyzed ticker, same columns as the results CSV
+ROW_FMT = '{:<8} {:>11} {:>11} {:>9} {:>9} {:>9} {:>9} {:>9} {:>9}'
 
 if __name__ == '__main__':
   parser = argparse.ArgumentParser(description='Calculate Intrinsic Value of Businesses Using Batch Mode!')
@@ -67,19 +71,28 @@ if __name__ == '__main__':
   if args.gen_file:
     csv_list = []
     csv_header = ['Stock', 'Rev_Growth_Estimate (%)', 'FCF_Margin_Estimate (%)']
-    tickers = np.loadtxt('./ticker_groups/'+args.file, dtype=str)
-    for t in tickers:
-      tmp_list = []
-      tmp_list.append(t)
-      print('\nFetching ${} data'.format(t))
-      get_info(t)
-      print('')
-      future_rev_growth  = float(input('Expected Future Revenue Growth for {} Stock? ---------- in % (i.e. 6) : '.format(t)))
-      future_fcf_margins = float(input('Expected Future Free Cash Flow Margin for {} Stock?  in % (i.e. 13.6) : '.format(t)))
-      tmp_list.append(future_rev_growth)
-      tmp_list.append(future_fcf_margins)
-      csv_list.append(tmp_list)
-      print('-------------------------------------------------------------------------------------------------------------------')
+    # One ticker per line (or separated by any whitespace)
+    with open('./ticker_groups/'+args.file) as f:
+      tickers = f.read().split()
+    # Later tickers are fetched in the background while the user answers the prompts
+    pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS)
+    fetched = [pool.submit(get_info, t) for t in tickers]
+    try:
+      for t, future in zip(tickers, fetched):
+        tmp_list = []
+        tmp_list.append(t)
+        print('\nFetching ${} data'.format(t))
+        print(future.result().info_str)
+        print('')
+        future_rev_growth  = float(input('Expected Future Revenue Growth for {} Stock? ---------- in % (i.e. 6) : '.format(t)))
+        future_fcf_margins = float(input('Expected Future Free Cash Flow Margin for {} Stock?  in % (i.e. 13.6) : '.format(t)))
+        tmp_list.append(future_rev_growth)
+        tmp_list.append(future_fcf_margins)
+        csv_list.append(tmp_list)
+        print('-------------------------------------------------------------------------------------------------------------------')
+    finally:
+      # Also on a bad answer, Ctrl-C or a failed fetch, so exiting does not wait for the queued fetches
+      pool.shutdown(cancel_futures=True)
 
     with open('./batch_mode_files/'+csv_fname, 'w', newline='') as f:
       write = csv.writer(f)
@@ -88,31 +101,54 @@ if __name__ == '__main__':
 
     print('\nWrote CSV file at {}, please run \'python batch_mode.py {}\' to get fair values.'.format('./batch_mode_files/'+csv_fname, csv_fname))
   else:
-    # Read CSV
+    # Read CSV, pandas is only imported on this branch since --gen_file does not need it
+    import pandas as pd
     data = pd.read_csv('./batch_mode_files/'+args.file, index_col=0)
     # data['FCF_Margin_Estimate (%)'] = data['FCF_Margin_Estimate (%)'].astype(np.float32)
     # data['Rev_Growth_Estimate (%)'] = data['Rev_Growth_Estimate (%)'].astype(np.float32)
     # exit()
 
-    # Run subprocesses in silent mode
-    csv_list = []
-    for t in data.index:
-      tmp_list = []
-      tmp_list.append(t)
-      current_price, total_shares, prev_rev_growth, starting_rev, prev_fcf_margin, data = get_info(t)
-      print(data, '\n')
-      time.sleep(2.5) # Allow 2 requests per 5 second interval
-      results = dcf(data.loc[t]['Rev_Growth_Estimate (%)']/100., data.loc[t]['FCF_Margin_Estimate (%)']/100., args.N, starting_rev, args.rrr/100., args.tgr/100., total_shares, current_price)
-      fv, r_rg, r_wacc, r_fcf, rev_growth = results
-      tmp_list.append('$'+str(round(fv, 2)))
-      tmp_list.append('$'+str(round(current_price, 2)))
-      tmp_list.append(str(calc_up_downside(fv, current_price))+'%')
-      tmp_list.append(str(rev_growth)+'%')
-      tmp_list.append(str(round(data.loc[t]['FCF_Margin_Estimate (%)'], 2))+'%')
-      tmp_list.append(str(r_rg)+'%')
-      tmp_list.append(str(r_fcf)+'%')
-      tmp_list.append(str(r_wacc)+'%')
-      print('Analyzed ${}\n'.format(t))
-      csv_list.append(tmp_list)
+    tickers     = data.index.tolist()
+    rev_growths = data['Rev_Growth_Estimate (%)'].to_numpy(dtype=np.float64)/100.
+    fcf_margins = data['FCF_Margin_Estimate (%)'].to_numpy(dtype=np.float64)/100.
+
+    # Fetch every ticker first, then value them all in one dcf_batch call
+    infos = {}
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+      futures = {pool.submit(get_info, t): t for t in tickers}
+      for future in as_completed(futures):
+        info = future.result()
+        print(info.info_str, '\n')
+        infos[futures[future]] = info
+    infos = [infos[t] for t in tickers]
+
+    current_prices = [info.current_price for info in infos]
+    results = dcf_batch(rev_growths, fcf_margins, args.N, [info.starting_rev for info in infos], \
+                        args.rrr/100., args.tgr/100., [info.total_shares for info in infos], current_prices)
+
+    # Results stay numeric arrays until here, then each CSV column is formatted in one pass
+    fair_values, req_rev_growths, req_waccs, req_fcf_margins, rev_growth_pcts = results
+    current_prices = np.asarray(current_prices, dtype=np.float64)
+    # Same as calc_up_downside, for every ticker at once
+    upsides = np.round(((fair_values - current_prices)/current_prices)*100, 2)
+
+    def as_text(column, prefix='', suffix=''):
+      text = np.char.add(np.char.add(prefix, np.round(column, 2).astype(str)), suffix)
+      return np.where(np.isnan(column), NO_SOLUTION, text)
+
+    csv_list = list(zip(tickers, \
+                        as_text(fair_values, prefix='$'), \
+                        as_text(current_prices, prefix='$'), \
+                        as_text(upsides, suffix='%'), \
+                        as_text(rev_growth_pcts, suffix='%'), \
+                        as_text(100*fcf_margins, suffix='%'), \
+                        as_text(req_rev_growths, suffix='%'), \
+                        as_text(req_fcf_margins, suffix='%'), \
+                        as_text(req_waccs, suffix='%')))
+    print(ROW_FMT.format('Stock', 'Fair Value', 'Price', 'Up/Down', 'Rev Gr', 'FCF Mgn', \
+                         'Req Rev', 'Req FCF', 'Req Ret'))
+    for row in csv_list:
+      print(ROW_FMT.format(*row))
+    print()
 
     write_batch_mode_csv('dcf_results.csv', csv_list)
\ No newline at end of file
@@ -0,0 +1,26 @@
+'''
+Compiles the DCF kernels in src/kernels.py ahead of time with numba so the
+first fair value calculation does not wait on the JIT compiler.
+
+$ python build_aot.py
+
+Writes the dcf_kernels extension module into ./src, which src/provider.py
+imports in place of the jitted kernels when it is present.
+'''
+
+from numba.pycc import CC
+from src import kernels
+
+cc = CC('dcf_kernels')
+cc.output_dir = './src'
+
+# Same signatures the jitted kernels are compiled with
+cc.export('project_fv',          kernels.PROJECT_FV_SIG)(kernels.project_fv.py_func)
+cc.export('project_fv_batch',    kernels.PROJECT_FV_BATCH_SIG)(kernels.project_fv_batch.py_func)
+cc.export('solve_rev_growth',    kernels.SOLVE_ONE_SIG)(kernels.solve_rev_growth.py_func)
+cc.export('solve_fcf_margin',    kernels.SOLVE_ONE_SIG)(kernels.solve_fcf_margin.py_func)
+cc.export('solve_discount_rate', kernels.SOLVE_DISCOUNT_SIG)(kernels.solve_discount_rate.py_func)
+cc.export('reverse_dcf_batch',   kernels.SOLVE_BATCH_SIG)(kernels.reverse_dcf_batch.py_func)
+
+if __name__ == '__main__':
+  cc.compile()
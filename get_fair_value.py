@@ -33,11 +33,8 @@ or
 $ python get_fair_value.py INTC 12.2 20 --N 7 --rrr 10 --tgr 2.5 -S
 '''
 
-from scipy.optimize import minimize_scalar
 import argparse
 from src.provider import *
-import warnings
-warnings.simplefilter(action='ignore', category=FutureWarning)
 
 # Parse user arguments
 parser = argparse.ArgumentParser(description='Calculate Intrinsic Value of A Business!')
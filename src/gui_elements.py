@@ -1,56 +1,69 @@
-from scipy.optimize import minimize_scalar
 from PySide6.QtWidgets import QLabel, QLineEdit, QPushButton, QVBoxLayout, QHBoxLayout, QWidget, QPlainTextEdit, QSizePolicy, QToolButton, QGridLayout, QTextEdit, QTableWidgetItem, QSlider
-from PySide6.QtGui import QFont
-from PySide6.QtCore import Qt, QSize
+from PySide6.QtGui import QFont, QDoubleValidator, QIntValidator
+from PySide6.QtCore import Qt, QSize, QLocale
 from src.provider import *
-import warnings
-warnings.simplefilter(action='ignore', category=FutureWarning)
+import functools
 
 font_name = "Consolas"
 
-def get_push_button(text, funct, font_size):
-	button = QPushButton(text)
+# Built once, every push button gets the same style sheet string and icon size
+_BUTTON_STYLE = "QPushButton { background-color: #333333; \
+		                  color: #ffffff; } \
+		                  QPushButton::pressed \
+		                  { background-color: light-blue }; \
+		                  padding: 8px; border-radius: 10px;"
+_ICON_SIZE = QSize(24, 24)
+
+# One QFont and one size policy per kind, shared by every widget that uses them.
+# Bold is part of the font rather than a per-widget style sheet, which Qt would parse for each widget
+@functools.cache
+def get_font(font_size, bold=False):
 	font = QFont(font_name, font_size)
 	font.setStyleHint(QFont.Monospace)
 	font.setPointSize(font_size)
+	font.setBold(bold)
+	return font
+
+@functools.cache
+def get_expanding_policy():
+	return QSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+
+def get_double_validator(bottom, top, decimals, parent):
+	# Plain decimals with a '.' point, the same strings float() accepts
+	validator = QDoubleValidator(bottom, top, decimals, parent)
+	validator.setNotation(QDoubleValidator.StandardNotation)
+	validator.setLocale(QLocale.c())
+	return validator
+
+def get_int_validator(bottom, top, parent):
+	validator = QIntValidator(bottom, top, parent)
+	validator.setLocale(QLocale.c())
+	return validator
+
+def get_push_button(text, funct, font_size):
+	button = QPushButton(text)
+	font = get_font(font_size)
 	button.setFont(font)
-	button.setStyleSheet("QPushButton { background-color: #333333; \
-		                  color: #ffffff; } \
-		                  QPushButton::pressed \
-		                  { background-color: light-blue }; \
-		                  padding: 8px; border-radius: 10px;")
-	button.setIconSize(QSize(24, 24))
+	button.setStyleSheet(_BUTTON_STYLE)
+	button.setIconSize(_ICON_SIZE)
 	button.clicked.connect(funct)
 	return button
 
 def get_text_entry_box(label, font_size, bold=False, readOnly=False):
+	# Same label and entry as get_text_entry_box_two, laid out side by side
+	field_entry, field_text = get_text_entry_box_two(label, font_size, bold, readOnly)
 	layout = QHBoxLayout()
-	field_text = QLabel(label)
-	font = QFont(font_name, font_size)
-	font.setStyleHint(QFont.Monospace)
-	font.setPointSize(font_size)
-	field_text.setFont(font)
-	if bold: field_text.setStyleSheet("font-weight: bold")
-	field_entry = QLineEdit()
-	field_entry.setFixedWidth(120)
-	field_entry.setFont(font)
-	if bold: field_entry.setStyleSheet("font-weight: bold")
-	if readOnly: field_entry.setReadOnly(True)
 	layout.addWidget(field_text, alignment=Qt.AlignRight)
 	layout.addWidget(field_entry, alignment=Qt.AlignLeft)
 	return field_entry, layout
 
 def get_text_entry_box_two(label, font_size, bold=False, readOnly=False):
 	field_text = QLabel(label)
-	font = QFont(font_name, font_size)
-	font.setStyleHint(QFont.Monospace)
-	font.setPointSize(font_size)
+	font = get_font(font_size, bold)
 	field_text.setFont(font)
-	if bold: field_text.setStyleSheet("font-weight: bold")
 	field_entry = QLineEdit()
 	field_entry.setFixedWidth(120)
 	field_entry.setFont(font)
-	if bold: field_entry.setStyleSheet("font-weight: bold")
 	if readOnly: field_entry.setReadOnly(True)
 	return field_entry, field_text
 
@@ -66,11 +79,9 @@ def get_dark_mode_toggle_button(funct):
 def get_information_layout(font_size):
 	info_layout = QVBoxLayout()
 	info_text = QTextEdit()
-	font = QFont(font_name, font_size)
-	font.setStyleHint(QFont.Monospace)
-	font.setPointSize(font_size)
+	font = get_font(font_size)
 	info_text.setFont(font)
-	info_text.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+	info_text.setSizePolicy(get_expanding_policy())
 	info_text.setReadOnly(True)
 	info_layout.addWidget(info_text, alignment=Qt.AlignBottom)
 	return info_text, info_layout
@@ -87,10 +98,7 @@ def get_central_buttons(funct_reset, funct_calc, funct_populate, font_size):
 
 def get_label(text, font_size, bold=False):
 	label  = QLabel(text)
-	font = QFont(font_name, font_size)
-	font.setStyleHint(QFont.Monospace)
-	font.setPointSize(font_size)
+	font = get_font(font_size, bold)
 	label.setFont(font)
-	if bold: label.setStyleSheet("font-weight: bold")
-	label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+	label.setSizePolicy(get_expanding_policy())
 	return label
\ No newline at end of file
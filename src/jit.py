@@ -0,0 +1,12 @@
+'''
+Numba JIT decorator with a plain Python fallback when numba is not installed
+'''
+
+try:
+  from numba import njit
+except ImportError:
+  def njit(*args, **kwargs):
+    # Used bare (@njit) or with options (@njit(cache=True)); either way run as Python
+    if len(args) == 1 and callable(args[0]) and not kwargs:
+      return args[0]
+    return lambda funct: funct
@@ -0,0 +1,145 @@
+'''
+Numeric DCF kernels. Kept free of yfinance/Qt imports so build_aot.py can
+compile them ahead of time.
+'''
+
+import numpy as np
+from src.jit import njit
+from src.solvers import make_brentq, make_rtsafe
+
+# Explicit signatures compile the public kernels when this module is imported
+# (or load them from numba's cache), and are shared with build_aot.py. Arrays are
+# C-contiguous ([::1]), which src/provider.py guarantees, so numba emits unit-stride loops
+PROJECT_FV_SIG       = 'f8(f8[::1], f8[::1], i8, f8, f8, f8, f8)'
+PROJECT_FV_BATCH_SIG = 'f8[::1](f8[::1], f8[::1], i8, f8[::1], f8, f8, f8[::1])'
+SOLVE_ONE_SIG        = 'f8(f8[::1], i8, f8, f8, f8, f8, f8)'
+SOLVE_DISCOUNT_SIG   = 'f8(f8[::1], f8[::1], i8, f8, f8, f8, f8)'
+SOLVE_BATCH_SIG      = 'f8[:, ::1](f8[::1], f8[::1], i8, f8[::1], f8, f8, f8[::1], f8[::1])'
+
+# Lets the FCF sum be reassociated (vectorized) and multiply-adds fused. Divisions stay
+# exact and nan, inf and signed zeros are handled as usual
+_FASTMATH = {'reassoc', 'contract'}
+
+@njit(cache=True, nogil=True)
+def _project_fcf(rev_growth, fcf_margin, nyears, starting_rev):
+  # Yearly free cash flow for the next nyears
+  revenue = starting_rev*np.cumprod(1+rev_growth[:nyears])
+  return revenue*fcf_margin[:nyears]
+
+@njit(cache=True, nogil=True, fastmath=_FASTMATH)
+def _fcf_value(fcf, discount_factors, wacc, tgr, shares):
+  # Discount projected FCF back in terms of today's dollars
+  discounted_fcf = np.sum(fcf*discount_factors)
+
+  # Terminal value (discounted)
+  terminal_value = (fcf[-1] * (1+tgr))/(wacc - tgr)
+  terminal_value *= discount_factors[-1]
+
+  # Fair value per share
+  return (discounted_fcf + terminal_value)/shares
+
+@njit(cache=True, nogil=True)
+def _fair_value(rev_growth, fcf_margin, nyears, starting_rev, discount_factors, wacc, tgr, shares):
+  return _fcf_value(_project_fcf(rev_growth, fcf_margin, nyears, starting_rev), \
+                    discount_factors, wacc, tgr, shares)
+
+@njit(cache=True, nogil=True)
+def _discount_factors(wacc, nyears):
+  # 1/(1+wacc)**t for t = 1..nyears as a running product, no pow() or divide per year
+  return np.cumprod(np.full(nyears, 1.0/(1.0+wacc)))
+
+@njit(PROJECT_FV_SIG, cache=True, nogil=True)
+def project_fv(rev_growth, fcf_margin, nyears, starting_rev, wacc, tgr, shares):
+  discount_factors = _discount_factors(wacc, nyears)
+  return _fair_value(rev_growth, fcf_margin, nyears, starting_rev, discount_factors, wacc, tgr, shares)
+
+@njit(PROJECT_FV_BATCH_SIG, cache=True, nogil=True)
+def project_fv_batch(rev_growth, fcf_margin, nyears, starting_rev, wacc, tgr, shares):
+  # Fair value for many tickers at once, each with a constant growth rate and FCF margin.
+  # All of them share nyears, wacc and tgr, so the discount factors are built once and
+  # every year is one operation across all tickers
+  discount_factors = _discount_factors(wacc, nyears)
+  ntickers = rev_growth.shape[0]
+  growth = np.ones(ntickers)
+  fcf = np.zeros(ntickers)
+  discounted_fcf = np.zeros(ntickers)
+  for year in range(nyears):
+    growth = growth*(1+rev_growth)
+    fcf = (starting_rev*growth)*fcf_margin
+    discounted_fcf += fcf*discount_factors[year]
+
+  # Terminal value (discounted) from the last year's FCF
+  terminal_value = (fcf * (1+tgr))/(wacc - tgr)
+  terminal_value *= discount_factors[-1]
+  return (discounted_fcf + terminal_value)/shares
+
+# Reverse DCF residuals for the iterative solves, each monotone in a single unknown. Whatever
+# does not depend on the unknown (discount factors, or the FCF path when solving for wacc)
+# is computed once per solve and passed in.
+@njit(cache=True, nogil=True)
+def _res_rg(rev_growth_rate, fcf_margin, nyears, starting_rev, discount_factors, wacc, tgr, shares, price):
+  # Also returns the derivative for Newton's method. With a constant growth rate g, year
+  # k's FCF goes with (1+g)**k, so its slope is k/(1+g) times its discounted value
+  fcf = _project_fcf(np.full(nyears, rev_growth_rate), fcf_margin, nyears, starting_rev)
+  discounted_fcf = fcf*discount_factors
+  terminal_value = (discounted_fcf[-1] * (1+tgr))/(wacc - tgr)
+  slope = (np.sum(np.arange(1, nyears+1)*discounted_fcf) + nyears*terminal_value) \
+          /((1+rev_growth_rate)*shares)
+  return _fcf_value(fcf, discount_factors, wacc, tgr, shares) - price, slope
+
+@njit(cache=True, nogil=True)
+def _res_wacc(wacc, fcf, nyears, tgr, shares, price):
+  return _fcf_value(fcf, _discount_factors(wacc, nyears), wacc, tgr, shares) - price
+
+_rtsafe_rg   = make_rtsafe(_res_rg)
+_brentq_wacc = make_brentq(_res_wacc)
+
+# Reverse DCF solves, with the discount factors passed in so a batch can share them
+# Brackets: revenue growth in [-99%, 1000%], discount rate above tgr (the FCF margin is exact)
+@njit(cache=True, nogil=True)
+def _solve_rev_growth(fcf_margin, nyears, starting_rev, discount_factors, wacc, tgr, shares, price):
+  # Newton from a typical 10% growth rate, bisecting within the bracket if it strays
+  return _rtsafe_rg(-0.99, 10.0, 0.1, 1e-5, 60, \
+                    fcf_margin, nyears, starting_rev, discount_factors, wacc, tgr, shares, price)
+
+@njit(cache=True, nogil=True)
+def _solve_fcf_margin(rev_growth, nyears, starting_rev, discount_factors, wacc, tgr, shares, price):
+  # Fair value is linear in a constant FCF margin, so no iteration is needed
+  unit_fv = _fair_value(rev_growth, np.ones(nyears), nyears, \
+                        starting_rev, discount_factors, wacc, tgr, shares)
+  if unit_fv == 0:
+    return np.nan
+  # Exact, so unlike the iterative solves there is no bracket to stay within
+  return price/unit_fv
+
+@njit(SOLVE_ONE_SIG, cache=True, nogil=True)
+def solve_rev_growth(fcf_margin, nyears, starting_rev, wacc, tgr, shares, price):
+  discount_factors = _discount_factors(wacc, nyears)
+  return _solve_rev_growth(fcf_margin, nyears, starting_rev, discount_factors, wacc, tgr, shares, price)
+
+@njit(SOLVE_ONE_SIG, cache=True, nogil=True)
+def solve_fcf_margin(rev_growth, nyears, starting_rev, wacc, tgr, shares, price):
+  discount_factors = _discount_factors(wacc, nyears)
+  return _solve_fcf_margin(rev_growth, nyears, starting_rev, discount_factors, wacc, tgr, shares, price)
+
+@njit(SOLVE_DISCOUNT_SIG, cache=True, nogil=True)
+def solve_discount_rate(rev_growth, fcf_margin, nyears, starting_rev, tgr, shares, price):
+  fcf = _project_fcf(rev_growth, fcf_margin, nyears, starting_rev)
+  return _brentq_wacc(tgr+1e-4, 10.0, 1e-5, 60, fcf, nyears, tgr, shares, price)
+
+@njit(SOLVE_BATCH_SIG, cache=True, nogil=True)
+def reverse_dcf_batch(rev_growth, fcf_margin, nyears, starting_rev, wacc, tgr, shares, price):
+  # Reverse DCF for many tickers with constant growth rates and FCF margins, sharing nyears,
+  # wacc and tgr. Rows are the required revenue growth, discount rate and FCF margin
+  discount_factors = _discount_factors(wacc, nyears)
+  required = np.empty((3, rev_growth.shape[0]))
+  for i in range(rev_growth.shape[0]):
+    rev_growth_array = np.full(nyears, rev_growth[i])
+    fcf_margin_array = np.full(nyears, fcf_margin[i])
+    required[0, i] = _solve_rev_growth(fcf_margin_array, nyears, starting_rev[i], \
+                                       discount_factors, wacc, tgr, shares[i], price[i])
+    required[1, i] = solve_discount_rate(rev_growth_array, fcf_margin_array, nyears, \
+                                         starting_rev[i], tgr, shares[i], price[i])
+    required[2, i] = _solve_fcf_margin(rev_growth_array, nyears, starting_rev[i], \
+                                       discount_factors, wacc, tgr, shares[i], price[i])
+  return required
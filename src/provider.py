@@ -5,23 +5,52 @@ Authored by: @akashaero
 Provides important utilities to main programs for stock valuation
 '''
 
-import numpy as np
-import yfinance as yf
-import os, csv, time
-from tabulate import tabulate
-from scipy.optimize import minimize_scalar
+import os, csv, time, math, pickle, threading, warnings
 import functools
+from collections import namedtuple
+
+# yfinance (and pandas, as used by yfinance and _fetch_info) raise FutureWarnings on every
+# fetch. Only warnings from those call sites are ignored. A catch_warnings block around the
+# fetch would swap the process-wide filters from worker threads, which is not thread-safe
+warnings.filterwarnings('ignore', category=FutureWarning, module=r'(yfinance|src\.provider)(\.|$)')
 
 currency_symbols = {'USD':'$', 'JPY':'¥', 'AUD':'$', 'NZD':'$', 'EUR':'€', 'GBP':'£', 'ARS':'$', 'HKD':'$', 'INR':'₹', 'CAD':'$', 'MXN':'$', 'IDR':'Rp.', 'SGD':'$', 'CNY':'CN¥', 'TWD':'$'}
-conversion_multiples = {'USD':1.0, 'JPY':yf.Ticker('JPY=X').info['previousClose'], 'AUD':(1.0/yf.Ticker('AUDUSD=X').info['previousClose']), 'NZD':(1.0/yf.Ticker('NZDUSD=X').info['previousClose']), 'EUR':(1.0/yf.Ticker('EURUSD=X').info['previousClose']), 'GBP':(1.0/yf.Ticker('GBPUSD=X').info['previousClose']), 'ARS':yf.Ticker('ARS=X').info['previousClose'], 'HKD':yf.Ticker('HKD=X').info['previousClose'], 'INR':yf.Ticker('INR=X').info['previousClose'], 'CAD':yf.Ticker('CAD=X').info['previousClose'], 'MXN':yf.Ticker('MXN=X').info['previousClose'], 'IDR':yf.Ticker('IDR=X').info['previousClose'], 'SGD':yf.Ticker('SGD=X').info['previousClose'], 'CNY':yf.Ticker('CNY=X').info['previousClose'], 'TWD':yf.Ticker('TWD=X').info['previousClose']}
+# One yfinance Ticker per symbol. yfinance already shares a single HTTP session
+# (cookies and crumb) across Tickers, so this only saves rebuilding the objects
+_TICKERS = {}
+
+def _get_ticker(symbol):
+  import yfinance as yf
+  ticker = _TICKERS.get(symbol)
+  return ticker or _TICKERS.setdefault(symbol, yf.Ticker(symbol))
+
+# numpy, yfinance, tabulate and numba are slow to import, so they are loaded on first use
+
+# Held through the first call, so fetch threads starting together wait for one set of FX
+# lookups instead of each running all of them before the cache is filled
+_FX_LOCK = threading.Lock()
+
+def get_conversion_multiples():
+  with _FX_LOCK:
+    return _get_conversion_multiples()
+
+@functools.cache
+def _get_conversion_multiples():
+  return {'USD':1.0, 'JPY':_get_ticker('JPY=X').info['previousClose'], 'AUD':(1.0/_get_ticker('AUDUSD=X').info['previousClose']), 'NZD':(1.0/_get_ticker('NZDUSD=X').info['previousClose']), 'EUR':(1.0/_get_ticker('EURUSD=X').info['previousClose']), 'GBP':(1.0/_get_ticker('GBPUSD=X').info['previousClose']), 'ARS':_get_ticker('ARS=X').info['previousClose'], 'HKD':_get_ticker('HKD=X').info['previousClose'], 'INR':_get_ticker('INR=X').info['previousClose'], 'CAD':_get_ticker('CAD=X').info['previousClose'], 'MXN':_get_ticker('MXN=X').info['previousClose'], 'IDR':_get_ticker('IDR=X').info['previousClose'], 'SGD':_get_ticker('SGD=X').info['previousClose'], 'CNY':_get_ticker('CNY=X').info['previousClose'], 'TWD':_get_ticker('TWD=X').info['previousClose']}
+
+# Largest scale first, so the first match picks the suffix
+_OUT_STR_SCALES = ((1.0e12, 'T'), (1.0e9, 'B'), (1.0e6, 'M'), (1.0e3, 'K'))
 
 def get_out_str(num):
-  if num is np.isnan(num): return num
-  elif num > 1000.0 and num < 1000000.0: return str(np.round(num/1000.0, 2))+'K'
-  elif num > 1000000.0 and num < 1000000000.0: return str(np.round(num/1000000.0, 2))+'M'
-  elif num > 1000000000.0 and num < 1000000000000.0: return str(np.round(num/1000000000.0, 2))+'B'
-  elif num > 1000000000000.0: return str(np.round(num/1000000000000.0, 2))+'T'
-  return num
+  for scale, suffix in _OUT_STR_SCALES:
+    if num > scale: return f'{num/scale:.2f}{suffix}'
+  return f'{num:.2f}'
+
+# Reverse-DCF rates that have no solution inside the solver's bracket come back as nan
+NO_SOLUTION = 'N/A'
+
+def get_rate_str(rate, spec='', suffix=''):
+  return NO_SOLUTION if math.isnan(rate) else format(rate, spec)+suffix
 
 def not_a_float(num):
   if not type(num) == float:
@@ -29,34 +58,125 @@ def not_a_float(num):
   else:
     return False
 
-@functools.cache
+def _is_scalar(x):
+  # A single growth rate or margin (Python/NumPy number or 0-d array) rather than one per year,
+  # checked without building an array around it
+  import numpy as np
+  return np.isscalar(x) or getattr(x, 'ndim', None) == 0
+
+def _safe(d, key, default='-'):
+  # Yahoo leaves fields out, or sends None/nan, for many tickers
+  value = d.get(key)
+  if value is None or (isinstance(value, float) and math.isnan(value)):
+    return default
+  return value
+
+# Seconds a get_info() result is reused before yfinance is queried again
+INFO_CACHE_TTL = 300
+
+# get_info() results are also kept here for INFO_CACHE_TTL seconds, so restarting
+# the GUI or rerunning a script does not download the same ticker again
+INFO_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.iv_calc_cache')
+
+StockInfo = namedtuple('StockInfo', ['current_price', 'total_shares', 'prev_rev_growth', 'starting_rev', \
+                                     'prev_fcf_margin', 'info_str', 'extra_info'])
+
+# One lock per ticker, so concurrent callers (GUI workers, batch threads) wait
+# for a fetch in flight and then read it from the cache instead of repeating it
+_INFO_LOCKS = {}
+
+# ticker -> (expiry time, StockInfo). The expiry is INFO_CACHE_TTL after the data was
+# downloaded, also when it was read back from disk, so nothing is served older than that
+_INFO_CACHE = {}
+
 def get_info(ticker):
-  stock      = yf.Ticker(ticker)
+  # One spelling per symbol, so ' aapl' and 'AAPL' share the cache and the lock
+  ticker = ticker.strip().upper()
+  with _INFO_LOCKS.setdefault(ticker, threading.Lock()):
+    if not is_info_fresh(ticker):
+      # A Ticker keeps its own copy of what it downloaded, drop it so this refetches
+      _TICKERS.pop(ticker, None)
+      _INFO_CACHE[ticker] = _get_info_from_disk(ticker)
+    return _INFO_CACHE[ticker][1]
+
+def is_info_fresh(ticker, info=None):
+  # True while get_info() would still return its cached result for ticker (that same
+  # StockInfo, if given) without fetching again
+  cached = _INFO_CACHE.get(ticker)
+  return cached is not None and time.time() < cached[0] and (info is None or cached[1] is info)
+
+def prefetch_info(ticker):
+  # Fill get_info()'s cache ahead of a request, e.g. from a GUI worker thread.
+  # Failures are not cached, so the real request fetches again and reports them
+  try:
+    get_info(ticker)
+  except Exception:
+    pass
+
+def _get_info_from_disk(ticker):
+  # Returns (expiry time, StockInfo), the file's age counts against INFO_CACHE_TTL
+  path = os.path.join(INFO_CACHE_DIR, '{}.pkl'.format(ticker))
+  try:
+    expires = os.path.getmtime(path) + INFO_CACHE_TTL
+    if time.time() < expires:
+      with open(path, 'rb') as f:
+        return expires, pickle.load(f)
+  except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, TypeError, ValueError):
+    # Missing, unreadable or written by an incompatible version, fetch it again
+    pass
+
+  info = _fetch_info(ticker)
+  expires = time.time() + INFO_CACHE_TTL
+  try:
+    # Write next to the target and rename, so a reader never sees half a file
+    os.makedirs(INFO_CACHE_DIR, exist_ok=True)
+    tmp_path = '{}.{}.{}.tmp'.format(path, os.getpid(), threading.get_ident())
+    with open(tmp_path, 'wb') as f:
+      pickle.dump(info, f)
+    os.replace(tmp_path, path)
+    _prune_info_cache()
+  except OSError:
+    pass
+  return expires, info
+
+@functools.cache
+def _prune_info_cache():
+  # Once per process, drop expired entries (and left over temp or date-stamped files from
+  # older versions) so the folder does not grow with every ticker ever looked up
+  now = time.time()
+  for entry in os.scandir(INFO_CACHE_DIR):
+    try:
+      if now - entry.stat().st_mtime >= INFO_CACHE_TTL:
+        os.remove(entry.path)
+    except OSError:
+      pass
+
+def _fetch_info(ticker):
+  import numpy as np
+  from tabulate import tabulate
+  conversion_multiples = get_conversion_multiples()
+
+  stock      = _get_ticker(ticker)
   income     = stock.income_stmt
   cashflow   = stock.cashflow
   stock_info = stock.info
 
+  # Missing years (nan) are shown as '-'
+  def nan_to_dash(values):
+    return ['-' if np.isnan(x) else float(x) for x in values]
+
   # 3 years, 2 years, 1 year
   def get_rates(df):
-    results = []
-    for i in range(len(df) - 1):
-      if np.isnan(df[0]) or np.isnan(df[(len(df) - 1)-i]):
-        results.append('-')
-      else:
-        results.append(((df[0] / df[(len(df) - 1)-i])**(1/((len(df)-1)-i))) - 1)
-    return results
+    # Annualized growth from each older year up to the latest one
+    years = np.arange(len(df) - 1, 0, -1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+      return nan_to_dash((df[0] / df[years])**(1/years) - 1)
 
   # 3 years, 2 years, 1 year
   def get_margins(r, fcf):
-    results = []
     n = min(len(r), len(fcf))
-    for i in range(n-1):
-      if np.isnan(fcf[i]) or np.isnan(r[i]):
-        results.append('-')
-      else:
-        results.append(fcf[i]/r[i])
-    results.reverse()
-    return results
+    with np.errstate(divide='ignore', invalid='ignore'):
+      return nan_to_dash((fcf[:n-1] / r[:n-1])[::-1])
 
   def make_list(label, ar):
     if len(ar) > 3:
@@ -69,66 +189,67 @@ def get_info(ticker):
     else:
       start_idx = 1
     for i in range(len(ar)):
-      if ar[0] != '-':
+      if ar[i] != '-':
         tmp_list[start_idx] = str(round(100*ar[i], 2))+'%'
       start_idx += 1
       if start_idx >= len(tmp_list):
         break;
     return tmp_list[0:4]
 
-  starting_fcf    = float(cashflow.loc['Free Cash Flow'][0]) if not np.isnan(cashflow.loc['Free Cash Flow'][0]) else '-'
-  starting_rev    = float(income.loc['Total Revenue'][0]) if not np.isnan(income.loc['Total Revenue'][0]) else '-'
-  FCF_Margin      = round(100*starting_fcf / starting_rev, 2) if not starting_fcf == '-' or not starting_rev == '-' else '-'
+  # Pull the rows out of the DataFrames once, everything below works on plain float arrays
+  revenue_hist    = income.loc['Total Revenue'].to_numpy(dtype=float)
+  fcf_hist        = cashflow.loc['Free Cash Flow'].to_numpy(dtype=float)
+  diluted_hist    = income.loc['Diluted Average Shares'].to_numpy(dtype=float)
+
   current_price   = round(stock_info['currentPrice'] / conversion_multiples[stock_info['currency']], 2)
-  total_shares    = stock_info['sharesOutstanding'] if 'sharesOutstanding' in stock_info else income.loc['Basic Average Shares'][0]
-  starting_rev    = income.loc['Total Revenue'][0]
-  rev_growth      = get_rates(income.loc['Total Revenue'])
-  buybacks        = get_rates(income.loc['Diluted Average Shares'])
-  fcf_growth      = get_rates(cashflow.loc['Free Cash Flow'])
-  fcf_margins     = get_margins(income.loc['Total Revenue'], cashflow.loc['Free Cash Flow'])
+  total_shares    = stock_info['sharesOutstanding'] if 'sharesOutstanding' in stock_info else float(income.loc['Basic Average Shares'].iloc[0])
+  starting_rev    = revenue_hist[0]
+  rev_growth      = get_rates(revenue_hist)
+  buybacks        = get_rates(diluted_hist)
+  fcf_growth      = get_rates(fcf_hist)
+  fcf_margins     = get_margins(revenue_hist, fcf_hist)
   prev_rev_growth = rev_growth[-1]
   prev_fcf_margin = fcf_margins[-1]
 
   business_name   = stock_info['shortName']
-  fwdPE           = np.round(stock_info['forwardPE'], 2) if not np.isnan(stock_info['forwardPE']) else '-'
+  fwdPE           = _safe(stock_info, 'forwardPE')
+  fwdPE           = round(float(fwdPE), 2) if fwdPE != '-' else '-'
   currency        = stock_info['currency']
   financial_curr  = stock_info['financialCurrency']
-  PEG             = stock_info['trailingPegRatio'] if type(stock_info['trailingPegRatio']) == float else '-'
-  
-  # if not np.isnan(stock_info['trailingPegRatio'] if 'trailingPegRatio' in stock_info else np.nan) else '-'
+  PEG             = _safe(stock_info, 'trailingPegRatio')
 
   # float % of total shares outstanding
-  floatShares      = stock_info['floatShares'] if not np.isnan(stock_info['floatShares']) else '-'
+  floatShares      = _safe(stock_info, 'floatShares')
+  percFloat        = '-'
   if total_shares != '-' and floatShares != '-':
-    percFloat = str(np.round(100.*(floatShares / total_shares), 2))+'%'
+    percFloat = f'{round(100.*(floatShares / total_shares), 2)}%'
   
-  percent_short = str(np.round(stock_info['shortPercentOfFloat']*100., 2))+'%' if not np.isnan(stock_info['shortPercentOfFloat']) else '-'
+  percent_short    = _safe(stock_info, 'shortPercentOfFloat')
+  percent_short    = f"{round(percent_short*100., 2)}%" if percent_short != '-' else '-'
 
   # Covert all these to Thousands, Millions or Billions if not in tens
-  avgVol           = get_out_str(float(stock_info['averageVolume'])) if not np.isnan(stock_info['averageVolume']) else '-'
-  mcap             = '$'+get_out_str(float(stock_info['marketCap'] / conversion_multiples[currency])) if not np.isnan(stock_info['marketCap']) else '-'
+  avgVol           = _safe(stock_info, 'averageVolume')
+  avgVol           = get_out_str(float(avgVol)) if avgVol != '-' else '-'
+  mcap             = _safe(stock_info, 'marketCap')
+  mcap             = '$'+get_out_str(float(mcap / conversion_multiples[currency])) if mcap != '-' else '-'
 
   # For populating stock related data
   extra_info = ['$'+get_out_str(starting_rev / conversion_multiples[financial_curr]), get_out_str(total_shares), percFloat, percent_short, avgVol, mcap, conversion_multiples[financial_curr]]
   
   # # [Maybe in future]
-  # business_summary = stock_info['longBusinessSummary'] if not np.isnan(stock_info['longBusinessSummary']) else '-'
-  # book_val         = stock_info['bookValue'] if not np.isnan(stock_info['bookValue']) else '-'
-  # pb               = stock_info['priceToBook'] if not np.isnan(stock_info['priceToBook']) else '-'
-  # ttm_PS           = stock_info['priceToSalesTrailing12Months'] if not np.isnan(stock_info['priceToSalesTrailing12Months']) else '-'
-  # total_debt       = stock_info['totalDebt'] if not np.isnan(stock_info['totalDebt']) else '-'
-  # ROA              = stock_info['returnOnAssets'] if not np.isnan(stock_info['returnOnAssets']) else '-'
-  # ROE              = stock_info['returnOnEquity'] if not np.isnan(stock_info['returnOnEquity']) else '-'
-
-  if 'forwardPE' in stock_info and 'trailingPegRatio' in stock_info:
-    if not_a_float(fwdPE) or not_a_float(PEG):
-      analyst_growth = '-'
-    elif PEG == 0.0:
-      analyst_growth = '-'
-    else:
-      analyst_growth  = str(round(fwdPE / PEG, 2))+'%'
-  else:
+  # business_summary = _safe(stock_info, 'longBusinessSummary')
+  # book_val         = _safe(stock_info, 'bookValue')
+  # pb               = _safe(stock_info, 'priceToBook')
+  # ttm_PS           = _safe(stock_info, 'priceToSalesTrailing12Months')
+  # total_debt       = _safe(stock_info, 'totalDebt')
+  # ROA              = _safe(stock_info, 'returnOnAssets')
+  # ROE              = _safe(stock_info, 'returnOnEquity')
+
+  # fwdPE and PEG are '-' when Yahoo has no usable value, already looked up once above
+  if not_a_float(fwdPE) or not_a_float(PEG) or PEG == 0.0:
     analyst_growth = '-'
+  else:
+    analyst_growth = str(round(fwdPE / PEG, 2))+'%'
 
   header = [business_name+' ({})'.format(currency), '3 Years', '2 Years', '1 Year']
   table_data = []
@@ -136,87 +257,88 @@ def get_info(ticker):
   table_data.append(make_list('Dilution(+)/Buybacks(-)', buybacks))
   table_data.append(make_list('FCF Margins', fcf_margins))
   table_data.append(['Analyst Expected Growth (5Y)', analyst_growth, '-', '-'])
-  return current_price, total_shares, prev_rev_growth, starting_rev / conversion_multiples[financial_curr], prev_fcf_margin, tabulate(table_data, headers=header), extra_info
+  # Ready to display as is, the padding on the last row keeps it centred like the rows above
+  info_str = tabulate(table_data, headers=header) + '     '
+  return StockInfo(current_price, total_shares, prev_rev_growth, starting_rev / conversion_multiples[financial_curr], prev_fcf_margin, info_str, extra_info)
+
+@functools.cache
+def _load_kernels():
+  try:
+    # Ahead-of-time compiled kernels, see build_aot.py
+    from src import dcf_kernels as kernels
+  except ImportError:
+    from src import kernels
+  return kernels
 
 def dcf(rev_growth_array, fcf_margins_array, n_future_years, latest_revenue, \
         wacc, tgr, total_shares, current_price, reverse_dcf_mode=False):
-  if np.array([rev_growth_array]).shape == (1,):
+  import numpy as np
+  if _is_scalar(rev_growth_array):
     rev_growth_array = np.full(n_future_years, rev_growth_array)
 
-  if np.array([fcf_margins_array]).shape == (1,):
+  if _is_scalar(fcf_margins_array):
     fcf_margins_array = np.full(n_future_years, fcf_margins_array)
 
-  # Project FCF
-  proj_fcf = []
-  rev_inc = latest_revenue
-  for i in range(0, n_future_years):
-    rev_inc = rev_inc * (1+rev_growth_array[i])
-    proj_fcf.append(rev_inc*fcf_margins_array[i])
-
-  # Get discount factors
-  discount_factors = []
-  for i in range(0,n_future_years):
-    discount_factors.append((1+wacc)**(i+1))
+  # Fixed types (contiguous float64) so the jitted kernels compile once per session
+  rev_growth_array  = np.ascontiguousarray(rev_growth_array, dtype=np.float64)
+  fcf_margins_array = np.ascontiguousarray(fcf_margins_array, dtype=np.float64)
+  n_future_years    = int(n_future_years)
+  latest_revenue    = float(latest_revenue)
+  wacc, tgr         = float(wacc), float(tgr)
+  total_shares      = float(total_shares)
+  current_price     = float(current_price)
 
-  # Total discounted fcf for n_future_years
-  discounted_fcf = 0
-  for i, p in enumerate(proj_fcf):
-    discounted_fcf += p/discount_factors[i]
+  kernels = _load_kernels()
+  fair_value = kernels.project_fv(rev_growth_array, fcf_margins_array, n_future_years, \
+                                  latest_revenue, wacc, tgr, total_shares)
 
-  # Terminal value (discounted)
-  terminal_value = (proj_fcf[-1] * (1+tgr))/(wacc - tgr)
-  terminal_value /= discount_factors[-1]
-
-  # Total value for all shares
-  todays_value = discounted_fcf + terminal_value
-
-  # Fair value per share.
-  fair_value = todays_value/total_shares
+  if reverse_dcf_mode:
+    return fair_value
 
   assumed_cagr = calc_cagr(rev_growth_array, n_future_years)
 
-  if reverse_dcf_mode:
-    return fair_value
+  required_rev_growth    = round(100*kernels.solve_rev_growth(fcf_margins_array, n_future_years, latest_revenue, \
+                                                              wacc, tgr, total_shares, current_price), 2)
 
-  # Reverse DCF Functions
-  def reverse_dcf_revenue(rev_growth_rate, fcf_margins_array, n_future_years, \
-                        latest_revenue, wacc, tgr, total_shares, current_price):
-    return abs(dcf(np.full(n_future_years,rev_growth_rate), fcf_margins_array, \
-                           n_future_years, latest_revenue, wacc, tgr, total_shares, current_price, reverse_dcf_mode=True)\
-               - current_price)
-
-  def reverse_dcf_fcf_margin(fcf_margin, rev_growth_array, n_future_years, \
-                             latest_revenue, wacc, tgr, total_shares, \
-                             current_price):
-    return abs(dcf(rev_growth_array, np.full(n_future_years,fcf_margin), \
-                   n_future_years, latest_revenue, wacc, tgr, total_shares, current_price, reverse_dcf_mode=True) \
-               - current_price)
-
-  def reverse_dcf_discount_rate(wacc, rev_growth_array, fcf_margins_array, \
-                                n_future_years, latest_revenue, tgr, \
-                                total_shares, current_price):
-    return abs(dcf(rev_growth_array, fcf_margins_array, n_future_years, \
-                   latest_revenue, wacc, tgr, total_shares, current_price, reverse_dcf_mode=True) - current_price)
-
-  required_rev_growth    = round(100*minimize_scalar(reverse_dcf_revenue, \
-                         args=(fcf_margins_array, n_future_years, latest_revenue, \
-                               wacc, tgr, total_shares, \
-                               current_price)).x, 2)
-
-  required_discount_rate = round(100*minimize_scalar(reverse_dcf_discount_rate, \
-                           args=(rev_growth_array, fcf_margins_array, n_future_years, \
-                                 latest_revenue, tgr, total_shares, \
-                                 current_price)).x, 2)
-
-  required_fcf_margin    = round(100*minimize_scalar(reverse_dcf_fcf_margin, \
-                           args=(rev_growth_array, n_future_years, latest_revenue, \
-                                 wacc, tgr, total_shares, \
-                                 current_price)).x, 2)
+  required_discount_rate = round(100*kernels.solve_discount_rate(rev_growth_array, fcf_margins_array, n_future_years, \
+                                                                 latest_revenue, tgr, total_shares, current_price), 2)
 
-  
+  required_fcf_margin    = round(100*kernels.solve_fcf_margin(rev_growth_array, n_future_years, latest_revenue, \
+                                                              wacc, tgr, total_shares, current_price), 2)
 
   return round(fair_value, 2), required_rev_growth, required_discount_rate, required_fcf_margin, assumed_cagr
 
+def dcf_batch(rev_growths, fcf_margins, n_future_years, latest_revenues, \
+              wacc, tgr, total_shares, current_prices):
+  # dcf() for many tickers that share n_future_years, wacc and tgr, each with a constant
+  # growth rate and FCF margin. Returns the same five results as dcf(), one array each
+  import numpy as np
+  rev_growths     = np.ascontiguousarray(rev_growths, dtype=np.float64)
+  fcf_margins     = np.ascontiguousarray(fcf_margins, dtype=np.float64)
+  n_future_years  = int(n_future_years)
+  latest_revenues = np.ascontiguousarray(latest_revenues, dtype=np.float64)
+  wacc, tgr       = float(wacc), float(tgr)
+  total_shares    = np.ascontiguousarray(total_shares, dtype=np.float64)
+  current_prices  = np.ascontiguousarray(current_prices, dtype=np.float64)
+
+  kernels = _load_kernels()
+  fair_values = kernels.project_fv_batch(rev_growths, fcf_margins, n_future_years, \
+                                         latest_revenues, wacc, tgr, total_shares)
+
+  # Required growth, discount rate and FCF margin, one row each
+  required = np.round(100*kernels.reverse_dcf_batch(rev_growths, fcf_margins, n_future_years, latest_revenues, \
+                                                    wacc, tgr, total_shares, current_prices), 2)
+
+  return np.round(fair_values, 2), required[0], required[1], required[2], np.round(100*rev_growths, 2)
+
+def warm_up_imports():
+  # Import the fetch dependencies ahead of the first get_info, e.g. from a GUI worker thread
+  import yfinance, tabulate
+
+def warm_up_kernels():
+  # Compile (or load from numba's on-disk cache) the DCF kernels with dummy inputs
+  dcf(0.1, 0.2, 7, 1.0e9, 0.1, 0.025, 1.0e6, 100.0)
+
 def calc_up_downside(fair_value, current_price):
   if fair_value > current_price:
     # Stock is undervalued compared to current price
@@ -225,76 +347,62 @@ def calc_up_downside(fair_value, current_price):
     # Current price is overvalued compared to fair value
     return round(-100*((current_price - fair_value)/current_price), 2)
 
-def print_calculated_info(results, current_price, fcf_margins, prev_rev_growth, \
-                          prev_fcf_margin, tkr, tgr, wacc, n_future_years):
+def _calculated_info_lines(results, current_price, fcf_margins, tkr, tgr, wacc, n_future_years):
+  import numpy as np
   fv, r_rg, r_wacc, r_fcf, rev_growth = results
-  if np.array([fcf_margins]).shape == (1,):
-    pass
-  else:
+  if not _is_scalar(fcf_margins):
     fcf_margins = np.average(np.array(fcf_margins))
 
-  print('Based on your inputs, for next {} years,'.format(n_future_years))
-  print('Assuming {}% of average annual revenue growth,'.format(rev_growth))
-  print('         {}% of free cash flow margin, and'.format(fcf_margins))
-  print('         {}% of terminal growth rate,\n'.format(tgr))
-  print('The fair value for {} stock is ${} to get {}% of annualized return for next {} years.'\
-        .format(tkr, fv, wacc, n_future_years))
-  print('\nBased on previous close price of ${}, the upside/downside is {}%'\
-       .format(current_price, calc_up_downside(fv, current_price)))
-  print('\nTo justify the current stock price of ${}, Either,'\
-        .format(current_price))
-  print('{} would have to grow at {}% average annual rate for next {} years'\
-        .format(tkr, r_rg, n_future_years))
-  print('  or     have free cash flow margin of {}%'\
-        .format(r_fcf))
-  print('  or     you get {}% annualized return for next {} years compared to assumed {}% '\
-        .format(r_wacc, n_future_years, wacc))
+  return ['Based on your inputs, for next {} years,'.format(n_future_years),
+          'Assuming {}% of average annual revenue growth,'.format(rev_growth),
+          '         {}% of free cash flow margin, and'.format(fcf_margins),
+          '         {}% of terminal growth rate,\n'.format(tgr),
+          'The fair value for {} stock is ${} to get {}% of annualized return for next {} years.'\
+            .format(tkr, fv, wacc, n_future_years),
+          '\nBased on previous close price of ${}, the upside/downside is {}%'\
+            .format(current_price, calc_up_downside(fv, current_price)),
+          '\nTo justify the current stock price of ${}, Either,'\
+            .format(current_price),
+          '{} would have to grow at {} average annual rate for next {} years'\
+            .format(tkr, get_rate_str(r_rg, suffix='%'), n_future_years),
+          '  or     have free cash flow margin of {}'\
+            .format(get_rate_str(r_fcf, suffix='%')),
+          '  or     you get {} annualized return for next {} years compared to assumed {}% '\
+            .format(get_rate_str(r_wacc, suffix='%'), n_future_years, wacc)]
 
-def get_calculated_info(results, current_price, fcf_margins, prev_rev_growth, \
+def print_calculated_info(results, current_price, fcf_margins, prev_rev_growth, \
                           prev_fcf_margin, tkr, tgr, wacc, n_future_years):
-  fv, r_rg, r_wacc, r_fcf, rev_growth = results
-  if np.array([fcf_margins]).shape == (1,):
-    pass
-  else:
-    fcf_margins = np.average(np.array(fcf_margins))
+  # One write for the whole report instead of a print() per line
+  print('\n'.join(_calculated_info_lines(results, current_price, fcf_margins, tkr, tgr, wacc, n_future_years)))
 
-  out_str = ''
-  out_str += ('Based on your inputs, for next {} years,'.format(n_future_years))
-  out_str += ('Assuming {}% of average annual revenue growth,'.format(rev_growth))
-  out_str += ('         {}% of free cash flow margin, and'.format(fcf_margins))
-  out_str += ('         {}% of terminal growth rate,\n'.format(tgr))
-  out_str += ('The fair value for {} stock is ${} to get {}% of annualized return for next {} years.'\
-        .format(tkr, fv, wacc, n_future_years))
-  out_str += ('\nBased on previous close price of ${}, the upside/downside is {}%'\
-       .format(current_price, calc_up_downside(fv, current_price)))
-  out_str += ('\nTo justify the current stock price of ${}, Either,'\
-        .format(current_price))
-  out_str += ('{} would have to grow at {}% average annual rate for next {} years'\
-        .format(tkr, r_rg, n_future_years))
-  out_str += ('  or     have free cash flow margin of {}%'\
-        .format(r_fcf))
-  out_str += ('  or     you get {}% annualized return for next {} years compared to assumed {}% '\
-        .format(r_wacc, n_future_years, wacc))
-  return out_str
+def get_calculated_info(results, current_price, fcf_margins, prev_rev_growth, \
+                          prev_fcf_margin, tkr, tgr, wacc, n_future_years):
+  return ''.join(_calculated_info_lines(results, current_price, fcf_margins, tkr, tgr, wacc, n_future_years))
 
 def calc_cagr(rev_growth_array, N):
-  if np.array([rev_growth_array]).shape == (1,):
+  import numpy as np
+  if _is_scalar(rev_growth_array):
     return round(100*rev_growth_array, 2)
+  # dcf() expands a single growth rate to one per year, its CAGR is that rate. Returned
+  # directly, so it also matches the scalar case above instead of a compounded round trip
+  first = rev_growth_array[0] if len(rev_growth_array) == N else None
+  if first is not None and first > -1 and all(r == first for r in rev_growth_array):
+    return round(100*first, 2)
   final_val = 1
   for r in rev_growth_array:
     final_val *= (1+r)
-  return round(np.sign(final_val)*100*(np.abs(final_val/1)**(1/N) - 1), 2)
+  return round(np.sign(final_val)*100*(math.pow(abs(float(final_val)), 1/N) - 1), 2)
 
 def write_batch_mode_csv(fname, data):
-  if not os.path.exists('./batch_mode_files/results'):
-    os.mkdir('./batch_mode_files/results')
+  os.makedirs('./batch_mode_files/results', exist_ok=True)
   csv_header = ['stock', 'fair_value', 'current_price', 'upside/(downside)', \
                 'assumed_revenue_growth(%)', 'assumed_fcf_margin (%)', \
                 'current_price_rev_growth (%)', 'current_price_fcf_margin (%)', \
                 'current_price_required_return (%)']
   timestr = time.strftime("%Y%m%d-%H%M%S")
   print('Writing All Results in {} .....'.format('./batch_mode_files/results/'+timestr+'_'+fname))
-  with open('./batch_mode_files/results/'+timestr+'_'+fname, 'w', newline='') as f:
+  # Large buffer, so a big batch goes out in a few writes instead of one per 8 KB
+  with open('./batch_mode_files/results/'+timestr+'_'+fname, 'w', newline='', buffering=1<<20) as f:
     write = csv.writer(f)
     write.writerow(csv_header)
     write.writerows(data)
\ No newline at end of file
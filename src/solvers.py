@@ -0,0 +1,115 @@
+'''
+Jitted 1-D root finders used by the reverse DCF
+'''
+
+import numpy as np
+from src.jit import njit
+
+# Relative tolerance used by scipy.optimize.brentq
+_RTOL = 4*np.finfo(np.float64).eps
+
+def make_brentq(f):
+  # Brent's method for a root of f(x, *args) in [a, b], after scipy's zeros.c
+  # f is bound here instead of passed in so numba can cache the compiled solver
+  @njit(cache=True, nogil=True)
+  def brentq(a, b, xtol, maxiter, *args):
+    # Returns nan when f does not change sign over the bracket
+    xpre, xcur = a, b
+    fpre, fcur = f(xpre, *args), f(xcur, *args)
+    if fpre*fcur > 0:
+      return np.nan
+    if fpre == 0:
+      return xpre
+    if fcur == 0:
+      return xcur
+
+    xblk, fblk = 0.0, 0.0
+    spre, scur = 0.0, 0.0
+    for i in range(maxiter):
+      if fpre*fcur < 0:
+        xblk, fblk = xpre, fpre
+        spre = scur = xcur - xpre
+      if abs(fblk) < abs(fcur):
+        xpre, xcur, xblk = xcur, xblk, xcur
+        fpre, fcur, fblk = fcur, fblk, fcur
+
+      delta = (xtol + _RTOL*abs(xcur))/2
+      sbis  = (xblk - xcur)/2
+      if fcur == 0 or abs(sbis) < delta:
+        return xcur
+
+      if abs(spre) > delta and abs(fcur) < abs(fpre):
+        if xpre == xblk:
+          # Interpolate
+          stry = -fcur*(xcur - xpre)/(fcur - fpre)
+        else:
+          # Extrapolate
+          dpre = (fpre - fcur)/(xpre - xcur)
+          dblk = (fblk - fcur)/(xblk - xcur)
+          stry = -fcur*(fblk*dblk - fpre*dpre)/(dblk*dpre*(fblk - fpre))
+        if 2*abs(stry) < min(abs(spre), 3*abs(sbis) - delta):
+          # Good short step
+          spre, scur = scur, stry
+        else:
+          # Bisect
+          spre, scur = sbis, sbis
+      else:
+        # Bisect
+        spre, scur = sbis, sbis
+
+      xpre, fpre = xcur, fcur
+      if abs(scur) > delta:
+        xcur += scur
+      else:
+        xcur += delta if sbis > 0 else -delta
+      fcur = f(xcur, *args)
+    return xcur
+  return brentq
+
+def make_rtsafe(fdf):
+  # Newton's method for a root of f(x, *args) in [a, b], bisecting whenever a Newton step
+  # would leave the bracket or is not shrinking fast enough (rtsafe, Numerical Recipes).
+  # fdf(x, *args) returns f and its derivative together
+  @njit(cache=True, nogil=True)
+  def rtsafe(a, b, x0, xtol, maxiter, *args):
+    # Returns nan when f does not change sign over the bracket
+    fa, dfa = fdf(a, *args)
+    fb, dfb = fdf(b, *args)
+    if fa*fb > 0:
+      return np.nan
+    if fa == 0:
+      return a
+    if fb == 0:
+      return b
+
+    # Keep f(lo) < 0 < f(hi)
+    if fa < 0:
+      lo, hi = a, b
+    else:
+      lo, hi = b, a
+    x = x0 if min(a, b) < x0 < max(a, b) else (a + b)/2
+    dxold = abs(b - a)
+    dx = dxold
+    f, df = fdf(x, *args)
+    for i in range(maxiter):
+      if ((x - hi)*df - f)*((x - lo)*df - f) > 0 or abs(2*f) > abs(dxold*df):
+        # Bisect
+        dxold = dx
+        dx = (hi - lo)/2
+        x = lo + dx
+      else:
+        # Newton step
+        dxold = dx
+        dx = f/df
+        x -= dx
+      if abs(dx) < xtol:
+        return x
+      f, df = fdf(x, *args)
+      if f == 0:
+        return x
+      if f < 0:
+        lo = x
+      else:
+        hi = x
+    return x
+  return rtsafe
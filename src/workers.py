@@ -0,0 +1,25 @@
+'''
+Background workers that keep yfinance requests off the GUI thread
+'''
+
+from PySide6.QtCore import QObject, QRunnable, Signal
+from src.provider import get_info
+
+class WorkerSignals(QObject):
+	# (ticker, StockInfo) on success, (ticker, error message) on failure
+	finished = Signal(str, object)
+	error = Signal(str, str)
+
+class FetchWorker(QRunnable):
+	def __init__(self, ticker):
+		super().__init__()
+		self.ticker = ticker
+		self.signals = WorkerSignals()
+
+	def run(self):
+		try:
+			info = get_info(self.ticker)
+		except Exception as e:
+			self.signals.error.emit(self.ticker, str(e))
+		else:
+			self.signals.finished.emit(self.ticker, info)